@@ -0,0 +1,119 @@
+"""BM25 retrieval over bio paragraphs.
+
+Bios are long and only a few achievements matter for a given posting, so
+generate/edit prompts carry the paragraphs most relevant to the job
+instead of the whole document. One index is built per distinct bio text
+(cached by content hash) and scoring is a single NumPy column sum.
+
+Set BIO_RETRIEVAL=0 to switch retrieval off; callers then use their own
+fallback (full bio for generation, budget-trimmed bio for edits).
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+from typing import Optional
+
+import numpy as np
+
+from rate_limiter import estimate_tokens
+
+BIO_RETRIEVAL = os.getenv("BIO_RETRIEVAL", "1") != "0"
+BIO_TOP_K = 8  # max paragraphs per prompt
+BIO_TOKEN_BUDGET = 800  # max bio tokens per prompt
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it",
+    "of", "on", "or", "our", "that", "the", "this", "to", "we", "will", "with", "you", "your",
+}
+
+logger = logging.getLogger(__name__)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens without stopwords and single characters."""
+    return [t for t in re.findall(r"\w+", text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of paragraphs.
+
+    Per-term weights are precomputed into a (paragraphs x vocab) matrix,
+    so a query only sums the columns of its terms.
+    """
+
+    def __init__(self, paragraphs: list[str], k1: float = 1.5, b: float = 0.75):
+        self.paragraphs = paragraphs
+        docs = [tokenize(p) for p in paragraphs]
+        self.vocab = {t: i for i, t in enumerate(sorted({t for d in docs for t in d}))}
+        if not self.vocab:
+            # Empty or unreadable bio: nothing to score
+            self.weights = np.zeros((len(docs), 0), dtype=np.float32)
+            return
+
+        tf = np.zeros((len(docs), len(self.vocab)), dtype=np.float32)
+        for row, doc in enumerate(docs):
+            cols = [self.vocab[t] for t in doc]
+            np.add.at(tf[row], cols, 1)
+
+        n_docs = len(docs)
+        df = (tf > 0).sum(axis=0)
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+
+        lengths = tf.sum(axis=1, keepdims=True)
+        norm = k1 * (1 - b + b * lengths / max(float(lengths.mean()), 1.0))
+        self.weights = idf * tf * (k1 + 1) / (tf + norm)
+
+    def scores(self, query: str) -> np.ndarray:
+        cols = sorted({self.vocab[t] for t in tokenize(query) if t in self.vocab})
+        if not cols:
+            return np.zeros(len(self.paragraphs), dtype=np.float32)
+        return self.weights[:, cols].sum(axis=1)
+
+
+_INDEXES = {}
+_INDEX_LOCK = threading.Lock()
+
+
+def get_index(bio: str) -> BM25Index:
+    """Index for this bio text, built once per distinct content."""
+    key = hashlib.sha256(bio.encode("utf-8")).hexdigest()
+    with _INDEX_LOCK:
+        if key not in _INDEXES:
+            _INDEXES[key] = BM25Index([p for p in bio.split("\n") if p.strip()])
+        return _INDEXES[key]
+
+
+def select_relevant(bio: str, query: str, top_k: int = BIO_TOP_K,
+                    budget: int = BIO_TOKEN_BUDGET) -> Optional[str]:
+    """Top-k paragraphs most relevant to `query` within the token budget.
+
+    Paragraphs keep their original order. Returns None when retrieval is
+    disabled, the whole bio already fits the budget (no point dropping
+    low-scoring summary/motivation paragraphs), or nothing matches, so
+    the caller picks its own fallback.
+    """
+    if not BIO_RETRIEVAL or estimate_tokens(bio) <= budget:
+        return None
+
+    index = get_index(bio)
+    scores = index.scores(query)
+    ranked = np.argsort(-scores, kind="stable")
+
+    chosen, used = [], 0
+    for i in ranked:
+        if len(chosen) == top_k or scores[i] <= 0:
+            break
+        cost = estimate_tokens(index.paragraphs[i])
+        if used + cost > budget:
+            continue
+        chosen.append(i)
+        used += cost
+
+    if not chosen:
+        return None
+
+    logger.info("Bio retrieval: %d/%d paragraphs, ~%d of ~%d tokens",
+                len(chosen), len(index.paragraphs), used, estimate_tokens(bio))
+    return "\n".join(index.paragraphs[i] for i in sorted(chosen))
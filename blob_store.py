@@ -0,0 +1,144 @@
+"""Content-addressed storage for large text fields in graph state.
+
+The checkpointer snapshots `CoverLetterState` after every node, so bios,
+drafts and letters would be copied into every checkpoint. Nodes instead
+`put_text()` large strings once and keep the returned `blob:<sha256>`
+reference in state; `resolve()` turns references back into text when a
+node (or a notebook/server reader) actually needs it. Identical texts,
+e.g. the same bio across sessions, are stored once.
+"""
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+
+BLOB_PREFIX = "blob:"
+
+# Fields that hold references instead of inline text
+BLOB_FIELDS = [
+    "bio_gpt", "bio_claude", "version_gpt", "version_claude",
+    "analysis_text", "fusion_letter", "current_letter", "final_letter",
+]
+
+
+class BlobStore:
+    """In-process text store keyed by SHA-256, optionally mirrored to disk.
+
+    Set `BLOB_DIR` to keep blobs alongside a persistent checkpointer;
+    the default in-memory store matches MemorySaver's lifetime.
+    """
+
+    def __init__(self, directory: Path = None):
+        self.directory = directory
+        self._blobs = {}
+        self._touched = {}  # digest -> last put() time, protects fresh blobs from prune()
+        self._lock = threading.Lock()
+        if directory:
+            directory.mkdir(parents=True, exist_ok=True)
+
+    def put(self, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        with self._lock:
+            self._touched[digest] = time.monotonic()
+            if digest not in self._blobs:
+                self._blobs[digest] = text
+                if self.directory:
+                    path = self.directory / f"{digest}.txt"
+                    if not path.exists():
+                        path.write_text(text, encoding="utf-8")
+        return BLOB_PREFIX + digest
+
+    def get(self, ref: str) -> str:
+        digest = ref[len(BLOB_PREFIX):]
+        with self._lock:
+            if digest in self._blobs:
+                return self._blobs[digest]
+        if self.directory:
+            path = self.directory / f"{digest}.txt"
+            if path.exists():
+                text = path.read_text(encoding="utf-8")
+                with self._lock:
+                    self._blobs[digest] = text
+                return text
+        raise KeyError(f"Unknown blob: {ref}")
+
+    def __len__(self):
+        return len(self._blobs)
+
+    def prune(self, live_refs: set, grace_s: float = 60.0) -> int:
+        """Drop in-memory blobs not in `live_refs`; return how many were dropped.
+
+        Blobs put within `grace_s` are kept: a node may have stored text
+        whose checkpoint is not written yet. Disk mirrors are left alone.
+        """
+        live = {ref[len(BLOB_PREFIX):] for ref in live_refs}
+        cutoff = time.monotonic() - grace_s
+        with self._lock:
+            dead = [d for d in self._blobs if d not in live and self._touched.get(d, 0) < cutoff]
+            for digest in dead:
+                del self._blobs[digest]
+                self._touched.pop(digest, None)
+        return len(dead)
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(len(text.encode("utf-8")) for text in self._blobs.values())
+
+
+_blob_dir = os.getenv("BLOB_DIR")
+store = BlobStore(Path(_blob_dir) if _blob_dir else None)
+
+
+def put_text(text: str) -> str:
+    """Store text and return its reference."""
+    return store.put(text)
+
+
+def resolve(value):
+    """Return text for a blob reference; pass other values through unchanged."""
+    if isinstance(value, str) and value.startswith(BLOB_PREFIX):
+        return store.get(value)
+    return value
+
+
+def resolve_state(values: dict) -> dict:
+    """Copy of state values with all blob fields resolved, for display/export."""
+    return {k: resolve(v) if k in BLOB_FIELDS else v for k, v in values.items()}
+
+
+def prune_unreferenced(checkpointer, grace_s: float = 60.0) -> int:
+    """Drop blobs no checkpoint of any thread references (after deleting sessions)."""
+    live = set()
+    for checkpoint_tuple in checkpointer.list(None):
+        for value in checkpoint_tuple.checkpoint.get("channel_values", {}).values():
+            if isinstance(value, str) and value.startswith(BLOB_PREFIX):
+                live.add(value)
+    return store.prune(live, grace_s)
+
+
+def measure_checkpoint(graph, config: dict) -> dict:
+    """Size and serialisation time of the latest checkpoint for a thread.
+
+    Compares the stored checkpoint (with references) against the same
+    checkpoint with every blob field inlined.
+    """
+    checkpointer = graph.checkpointer
+    checkpoint = checkpointer.get_tuple(config).checkpoint
+    inlined = {**checkpoint, "channel_values": resolve_state(checkpoint["channel_values"])}
+
+    def _serialise(obj):
+        start = time.perf_counter()
+        _, data = checkpointer.serde.dumps_typed(obj)
+        return len(data), (time.perf_counter() - start) * 1000
+
+    size, ms = _serialise(checkpoint)
+    inline_size, inline_ms = _serialise(inlined)
+    return {
+        "checkpoint_bytes": size,
+        "serialise_ms": round(ms, 3),
+        "inline_bytes": inline_size,
+        "inline_serialise_ms": round(inline_ms, 3),
+        "blobs_stored": len(store),
+        "blob_bytes": store.total_bytes(),
+    }
@@ -0,0 +1,149 @@
+"""Rolling feedback context for the edit loop.
+
+Instead of resending every "Round 1..N" dislike, the edit node keeps a
+deduplicated list of constraints that are still active and sends it with
+the latest feedback, trimmed to a token budget. A new constraint on the
+same topic retires the old one, including reversals ("mention Python" ->
+"don't mention Python", "shorter" -> "longer"). All local, no LLM calls.
+"""
+import re
+
+from rate_limiter import estimate_tokens
+
+CONSTRAINT_TOKEN_BUDGET = 300  # earlier-round constraints sent per edit
+EDIT_BIO_TOKEN_BUDGET = 1200  # bio reference sent per edit
+DUPLICATE_OVERLAP = 0.7  # topic-word Jaccard above which two constraints are the same
+
+# Never split after these, so "e.g. mention Python" stays one constraint
+ABBREVIATIONS = ("e.g.", "i.e.", "etc.", "vs.", "approx.", "incl.", "dr.", "mr.", "ms.")
+
+# Negations and filler dropped before comparing, so a reversal matches the constraint it replaces
+IGNORED_WORDS = {"don", "dont", "do", "not", "no", "never", "t", "please", "it", "the", "a", "an"}
+
+# Opposite directions map to one topic word
+TOPIC_WORDS = {
+    "shorter": "length", "longer": "length", "shorten": "length", "lengthen": "length",
+    "more": "amount", "less": "amount", "fewer": "amount",
+    "formal": "register", "informal": "register", "casual": "register",
+    "add": "include", "remove": "include", "drop": "include", "mention": "include",
+    "keep": "include", "avoid": "include", "use": "include",
+}
+
+# Properties of the whole letter: any two constraints about them are the same topic
+SCALAR_TOPICS = {"length", "register"}
+
+
+def split_constraints(feedback: str) -> list[str]:
+    """Split free-text feedback into constraints at lines, bullets, sentences and clauses.
+
+    "Shorter, fewer cliches" -> ["Shorter", "fewer cliches"]; single words
+    are kept, abbreviations like "e.g." do not end a constraint.
+    """
+    constraints = []
+    for line in re.split(r"\n+|(?:^|\s)[•*]\s+", feedback):
+        current = ""
+        for piece in re.split(r"(?<=[.!?;,])\s+", line.strip()):
+            current = f"{current} {piece}" if current else piece
+            if current.lower().endswith(ABBREVIATIONS):
+                continue  # abbreviation, not a boundary
+            constraints.append(current)
+            current = ""
+        if current:
+            constraints.append(current)
+    constraints = [c.strip(" -*•\t,;") for c in constraints]
+    return [c for c in constraints if c]
+
+
+def _words(text: str) -> set[str]:
+    """Topic words of a constraint: polarity dropped, opposites unified."""
+    words = re.findall(r"\w+", text.lower())
+    return {TOPIC_WORDS.get(w, w) for w in words if w not in IGNORED_WORDS}
+
+
+def _same(a: set[str], b: set[str]) -> bool:
+    if not a or not b:
+        return a == b
+    if a & b & SCALAR_TOPICS:
+        return True  # "Shorter" vs "Make it longer"
+    return len(a & b) / len(a | b) >= DUPLICATE_OVERLAP
+
+
+def merge_constraints(active: list[str], feedback: str) -> list[str]:
+    """Add constraints from new feedback; it replaces older ones on the same topic.
+
+    Returned list is ordered oldest -> newest.
+    """
+    merged = list(active)
+    for constraint in split_constraints(feedback):
+        words = _words(constraint)
+        merged = [c for c in merged if not _same(_words(c), words)]
+        merged.append(constraint)
+    return merged
+
+
+def within_budget(constraints: list[str], budget: int = CONSTRAINT_TOKEN_BUDGET) -> list[str]:
+    """Newest constraints that fit the token budget, in original order."""
+    kept, used = [], 0
+    for constraint in reversed(constraints):
+        cost = estimate_tokens(constraint)
+        if used + cost > budget:
+            break
+        kept.append(constraint)
+        used += cost
+    return kept[::-1]
+
+
+def trim_to_budget(text: str, budget: int = EDIT_BIO_TOKEN_BUDGET) -> str:
+    """Leading paragraphs of `text` that fit the token budget."""
+    kept, used = [], 0
+    for para in text.split("\n"):
+        cost = estimate_tokens(para)
+        if used + cost > budget:
+            if not kept:
+                # First paragraph alone is over budget: truncate it (~4 chars/token)
+                kept.append(para[:budget * 4])
+            break
+        kept.append(para)
+        used += cost
+    return "\n".join(kept)
+
+
+def build_edit_feedback(earlier: list[str], latest: str) -> str:
+    """Format earlier active constraints plus the latest round's feedback."""
+    parts = []
+    if earlier:
+        parts.append(
+            "EARLIER CONSTRAINTS (lower priority; ignore any the latest feedback contradicts):\n"
+            + "\n".join(f"- {c}" for c in earlier)
+        )
+    parts.append(f"LATEST FEEDBACK (highest priority):\n{latest or 'none'}")
+    return "\n\n".join(parts)
+
+
+def _self_check():
+    """Behaviour check: `python edit_context.py`."""
+    assert split_constraints("Shorter") == ["Shorter"]
+    assert split_constraints("- Shorter") == ["Shorter"]
+    assert split_constraints("Shorter, fewer cliches") == ["Shorter", "fewer cliches"]
+    assert split_constraints("e.g. mention Python; also Rust") == ["e.g. mention Python", "also Rust"]
+    assert split_constraints("No cliches. I am eager is bad!\n* keep it formal") == [
+        "No cliches.", "I am eager is bad!", "keep it formal"]
+
+    # A reversal retires the old constraint; unrelated ones stay
+    active = merge_constraints([], "Shorter, fewer cliches")
+    active = merge_constraints(active, "Make it longer")
+    assert active == ["fewer cliches", "Make it longer"], active
+    assert merge_constraints(["Mention Python"], "Don't mention Python") == ["Don't mention Python"]
+    assert merge_constraints(["Mention Python"], "Mention Rust too") == ["Mention Python", "Mention Rust too"]
+
+    # Round 1 single-word feedback survives into round 2's earlier constraints
+    active = merge_constraints([], "Shorter")
+    active = merge_constraints(active, "No cliches")
+    assert active == ["Shorter", "No cliches"], active
+
+    assert trim_to_budget("x" * 100 + "\nyy", 5) == "x" * 20
+    print("edit_context self-check passed")
+
+
+if __name__ == "__main__":
+    _self_check()
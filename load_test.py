@@ -0,0 +1,94 @@
+"""Drive many concurrent sessions through server.py and report latencies.
+
+Start the mock LLM and the server first (see mock_llm.py), with BIO_DIR and
+INSIGHTS_FILE pointing at scratch copies, then:
+
+    python load_test.py --sessions 50 --url http://127.0.0.1:8000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+
+import httpx
+
+JOB = "Quant Researcher: analyse large market datasets, build ML trading signals in Python."
+
+
+class SessionFailed(Exception):
+    """A step of a load-test session returned an error status."""
+
+
+def _check(response: httpx.Response, step: str) -> httpx.Response:
+    if response.status_code >= 400:
+        raise SessionFailed(f"{step}: HTTP {response.status_code}")
+    return response
+
+
+async def run_session(client: httpx.AsyncClient, timings: dict):
+    """One full session: start -> confirm -> stream fusion -> 1 edit -> approve."""
+    t0 = time.perf_counter()
+    session = _check(await client.post("/sessions", json={"job_description": JOB}), "start").json()
+    sid = session["thread_id"]
+    try:
+        await _drive_session(client, sid, timings, t0)
+    finally:
+        # Free server-side checkpoints so repeated runs don't grow memory
+        await client.delete(f"/sessions/{sid}")
+
+
+async def _drive_session(client: httpx.AsyncClient, sid: str, timings: dict, t0: float):
+    _check(await client.post(f"/sessions/{sid}/category", json={}), "category")
+
+    t1 = time.perf_counter()
+    async with client.stream("GET", f"/sessions/{sid}/stream") as response:
+        _check(response, "stream")
+        async for line in response.aiter_lines():
+            if line == "event: error":
+                raise SessionFailed("stream: error event")
+    t2 = time.perf_counter()
+
+    feedback = {"score": 6, "dislikes": "Shorter, fewer cliches"}
+    _check(await client.post(f"/sessions/{sid}/feedback", json=feedback), "feedback")
+    t3 = time.perf_counter()
+    _check(await client.post(f"/sessions/{sid}/approve"), "approve")
+    t4 = time.perf_counter()
+
+    timings["classify"].append(t1 - t0)
+    timings["fusion"].append(t2 - t1)
+    timings["edit"].append(t3 - t2)
+    timings["total"].append(t4 - t0)
+
+
+async def main(url: str, sessions: int):
+    timings = {"classify": [], "fusion": [], "edit": [], "total": []}
+    async with httpx.AsyncClient(base_url=url, timeout=None) as client:
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(run_session(client, timings) for _ in range(sessions)), return_exceptions=True
+        )
+        wall = time.perf_counter() - start
+
+    failures = [r for r in results if isinstance(r, Exception)]
+    completed = sessions - len(failures)
+    print(f"{completed}/{sessions} sessions completed in {wall:.1f}s ({completed / wall:.2f} sessions/s)")
+    if failures:
+        reasons = Counter(str(f) if isinstance(f, SessionFailed) else type(f).__name__ for f in failures)
+        print(f"  {len(failures)} failed:")
+        for reason, count in reasons.most_common():
+            print(f"    {count:4d}  {reason}")
+    for step, values in timings.items():
+        if not values:
+            continue
+        values.sort()
+        p95 = values[int(0.95 * (len(values) - 1))]
+        print(f"  {step:9s} median {statistics.median(values):6.2f}s  p95 {p95:6.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--sessions", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.url, args.sessions))
@@ -1,9 +1,16 @@
 """Long-term memory management for Cover Letter Agent."""
 import json
+import os
+import threading
 from pathlib import Path
 from datetime import datetime
 
-INSIGHTS_FILE = Path("/home/anton/CV_agent/insights.json")
+INSIGHTS_FILE = Path(os.getenv("INSIGHTS_FILE", "/home/anton/CV_agent/insights.json"))
+
+# Serialises load -> merge -> save when several sessions share one process.
+# Readers need no lock: save_insights replaces the file atomically.
+# Re-entrant so save_insights can run inside a held lock.
+insights_lock = threading.RLock()
 
 
 def load_insights() -> dict:
@@ -21,9 +28,12 @@ def load_insights() -> dict:
 
 
 def save_insights(insights: dict):
-    """Save insights to file."""
-    with open(INSIGHTS_FILE, "w") as f:
-        json.dump(insights, f, indent=2)
+    """Save insights to file (atomically: readers never see a partial file)."""
+    tmp = INSIGHTS_FILE.with_name(f"{INSIGHTS_FILE.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with insights_lock:
+        with open(tmp, "w") as f:
+            json.dump(insights, f, indent=2)
+        os.replace(tmp, INSIGHTS_FILE)
 
 
 def extract_insights_prompt(user_likes: str, user_dislikes: str, current_insights: dict) -> str:
@@ -99,6 +109,20 @@ def merge_insights(current: dict, new_insights: dict, user_likes: str, user_disl
     return current
 
 
+def fold_concurrent_insights(compacted: dict, snapshot: dict, latest: dict) -> dict:
+    """Add items saved since `snapshot` (by other sessions) to `compacted`.
+
+    Compaction runs on a snapshot outside the lock; call this under
+    `insights_lock` with a fresh `latest` load before saving.
+    """
+    for key in ["tone", "content", "structure", "avoid"]:
+        for item in latest.get(key, []):
+            if item not in snapshot.get(key, []) and item not in compacted.get(key, []):
+                compacted.setdefault(key, []).append(item)
+    compacted["history"] = latest.get("history", [])
+    return compacted
+
+
 def get_insights_for_prompt() -> str:
     """Get formatted insights for use in prompts."""
     insights = load_insights()
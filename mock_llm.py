@@ -0,0 +1,62 @@
+"""Mock OpenRouter endpoint for load testing the server without API costs.
+
+Answers chat completions with canned text shaped like each real call
+(classification, letters, critic ===ANALYSIS===/===FUSION===, insight JSON).
+Simulates latency and a per-model requests/sec cap that returns 429 with
+Retry-After, so the rate limiter can be exercised.
+
+Run:  MOCK_LATENCY=1.5 MOCK_RPS=5 uvicorn mock_llm:app --port 8001
+Then: OPENROUTER_URL=http://127.0.0.1:8001/v1/chat/completions uvicorn server:app
+"""
+import asyncio
+import os
+import random
+import time
+from collections import defaultdict, deque
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+LATENCY = float(os.getenv("MOCK_LATENCY", "1.0"))  # mean seconds per call
+RPS = float(os.getenv("MOCK_RPS", "5"))  # allowed requests/sec per model
+
+LETTER = "\n\n".join([
+    "Dear hiring team, I built a data pipeline that processes terabytes of sensor time series.",
+    "I own projects end to end, from raw data to deployed ML models, and learn new domains fast.",
+    "Your data-heavy problems are exactly the work I want to do next.",
+])
+
+app = FastAPI(title="Mock LLM")
+_recent = defaultdict(deque)  # model -> timestamps of accepted requests
+
+
+def _reply(prompt: str) -> str:
+    if "Classify this job" in prompt:
+        return "CATEGORY: engineering\nCONFIDENCE: 90%"
+    if "===ANALYSIS===" in prompt:
+        return f"===ANALYSIS===\nVersion A is concrete, version B flows better.\n\n===FUSION===\n{LETTER}"
+    if "Output ONLY valid JSON" in prompt:
+        return '{"tone": [], "content": [], "structure": [], "avoid": []}'
+    return LETTER
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "")
+
+    now = time.monotonic()
+    window = _recent[model]
+    while window and now - window[0] > 1.0:
+        window.popleft()
+    if len(window) >= RPS:
+        return JSONResponse({"error": "rate limited"}, status_code=429, headers={"Retry-After": "1"})
+    window.append(now)
+
+    await asyncio.sleep(random.expovariate(1 / LATENCY))
+    prompt = body["messages"][-1]["content"]
+    content = _reply(prompt)
+    return {
+        "choices": [{"message": {"role": "assistant", "content": content}}],
+        "usage": {"total_tokens": (len(prompt) + len(content)) // 4},
+    }
@@ -1,14 +1,25 @@
 """OpenRouter API integration for Cover Letter Agent."""
+import asyncio
 import json
+import logging
 import os
 from pathlib import Path
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
+from rate_limiter import get_limiter, estimate_tokens
+
 load_dotenv(Path(__file__).parent / ".env")
 
 OPENROUTER_API_KEY = os.getenv("OpenRouterApi")
-OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+# Override with a local mock endpoint for load testing (see mock_llm.py)
+OPENROUTER_URL = os.getenv("OPENROUTER_URL", "https://openrouter.ai/api/v1/chat/completions")
+
+# One pooled HTTP session shared by all graph sessions in this process
+_http = requests.Session()
+_http.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=32))
+_http.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=32))
 
 MODELS = {
     "gemini_flash": "google/gemini-3-flash-preview",#"google/gemini-2.0-flash-001",
@@ -17,9 +28,21 @@ MODELS = {
     "claude_opus": "anthropic/claude-opus-4.6",
 }
 
+# Per-model throughput limits (requests/min, tokens/min, max parallel calls)
+MODEL_LIMITS = {
+    "gemini_flash": {"requests_per_min": 120, "tokens_per_min": 400_000, "max_concurrency": 16},
+    "gpt4o": {"requests_per_min": 60, "tokens_per_min": 200_000, "max_concurrency": 8},
+    "claude_sonnet": {"requests_per_min": 50, "tokens_per_min": 200_000, "max_concurrency": 8},
+    "claude_opus": {"requests_per_min": 30, "tokens_per_min": 100_000, "max_concurrency": 4},
+}
 
-def call_llm(model_key: str, prompt: str, system_prompt: str = "", max_tokens: int = 800) -> str:
-    """Call LLM via OpenRouter API."""
+MAX_RETRIES = 5
+
+logger = logging.getLogger(__name__)
+
+
+def _build_request(model_key: str, prompt: str, system_prompt: str, max_tokens: int) -> tuple[dict, dict]:
+    """Build headers and payload for an OpenRouter chat completion."""
     model = MODELS.get(model_key, model_key)
     messages = []
     if system_prompt:
@@ -36,10 +59,57 @@ def call_llm(model_key: str, prompt: str, system_prompt: str = "", max_tokens: i
         "max_tokens": max_tokens,
         "temperature": 0.7,
     }
+    return headers, payload
 
-    response = requests.post(OPENROUTER_URL, headers=headers, json=payload)
+
+def _retry_after(response, attempt: int) -> float:
+    """Seconds to wait after a 429: Retry-After header or exponential backoff."""
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return min(2 ** attempt, 30)
+
+
+def _post(model_key: str, prompt: str, system_prompt: str, max_tokens: int, ticket, attempt: int):
+    """Send one request; mark ticket and return response JSON, or None on 429."""
+    headers, payload = _build_request(model_key, prompt, system_prompt, max_tokens)
+    response = _http.post(OPENROUTER_URL, headers=headers, json=payload)
+    if response.status_code == 429:
+        ticket.throttle(_retry_after(response, attempt))
+        return None
     response.raise_for_status()
-    return response.json()["choices"][0]["message"]["content"]
+    data = response.json()
+    ticket.done((data.get("usage") or {}).get("total_tokens"))
+    return data
+
+
+def call_llm(model_key: str, prompt: str, system_prompt: str = "", max_tokens: int = 800) -> str:
+    """Call LLM via OpenRouter API, throttled by the shared per-model limiter."""
+    limiter = get_limiter(model_key, **MODEL_LIMITS.get(model_key, {}))
+    estimated = estimate_tokens(system_prompt + prompt) + max_tokens
+
+    for attempt in range(MAX_RETRIES):
+        with limiter.acquire(estimated) as ticket:
+            data = _post(model_key, prompt, system_prompt, max_tokens, ticket, attempt)
+        # On 429 the limiter sets a cooldown, so the next acquire waits it out
+        if data is not None:
+            return data["choices"][0]["message"]["content"]
+
+    raise RuntimeError(f"{model_key}: still rate limited after {MAX_RETRIES} attempts")
+
+
+async def acall_llm(model_key: str, prompt: str, system_prompt: str = "", max_tokens: int = 800) -> str:
+    """Async `call_llm`: waits on the limiter without blocking the event loop."""
+    limiter = get_limiter(model_key, **MODEL_LIMITS.get(model_key, {}))
+    estimated = estimate_tokens(system_prompt + prompt) + max_tokens
+
+    for attempt in range(MAX_RETRIES):
+        async with limiter.acquire_async(estimated) as ticket:
+            data = await asyncio.to_thread(_post, model_key, prompt, system_prompt, max_tokens, ticket, attempt)
+        if data is not None:
+            return data["choices"][0]["message"]["content"]
+
+    raise RuntimeError(f"{model_key}: still rate limited after {MAX_RETRIES} attempts")
 
 
 def classify_job(job_description: str) -> dict:
@@ -167,12 +237,12 @@ CANDIDATE BACKGROUND (for reference):
 USER'S ACCUMULATED PREFERENCES:
 {insights}
 
-USER'S FEEDBACK (all rounds):
+USER'S FEEDBACK:
 {feedback}
 
 RULES:
-- Implement ALL requested changes from ALL rounds
-- PRESERVE changes made in previous rounds — do NOT revert earlier fixes
+- Implement ALL changes in the LATEST FEEDBACK; it overrides earlier constraints
+- Keep honouring earlier constraints unless the latest feedback contradicts them — do NOT revert earlier fixes
 - Keep 250-300 words, 3 paragraphs
 - Do NOT draw physics-business parallels
 - Focus on data skills, independent work, ML/AI expertise
@@ -180,6 +250,7 @@ RULES:
 
 Output ONLY the edited letter."""
 
+    logger.info("edit_cover_letter prompt: %d chars (~%d tokens)", len(prompt), estimate_tokens(prompt))
     return call_llm(model_key, prompt, max_tokens=600)
 
 
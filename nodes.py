@@ -1,4 +1,6 @@
 """Node functions for LangGraph Cover Letter workflow."""
+import logging
+import os
 from pathlib import Path
 from docx import Document
 
@@ -7,9 +9,19 @@ from models import (
     classify_job, generate_cover_letter, critique_and_fuse,
     edit_cover_letter, extract_insights_from_feedback, compact_insights
 )
-from memory import load_insights, save_insights, merge_insights, get_insights_for_prompt
+from memory import (
+    load_insights, save_insights, merge_insights, fold_concurrent_insights,
+    get_insights_for_prompt, insights_lock
+)
+from blob_store import put_text, resolve
+from bio_index import select_relevant
+from edit_context import (
+    merge_constraints, split_constraints, within_budget, trim_to_budget, build_edit_feedback
+)
+
+BIO_DIR = Path(os.getenv("BIO_DIR", "/home/anton/Jobsearch_Anton_2026"))
 
-BIO_DIR = Path("/home/anton/Jobsearch_Anton_2026")
+logger = logging.getLogger(__name__)
 
 
 def load_docx(filepath: Path) -> str:
@@ -30,15 +42,15 @@ def node_classify(state: CoverLetterState) -> dict:
 
 
 def node_load_bios(state: CoverLetterState) -> dict:
-    """Load biography files based on category."""
+    """Load biography files based on category (stored as blob references)."""
     suffix = "Fin" if state["category"] == "finance" else "Eng"
 
     bio_gpt = load_docx(BIO_DIR / f"Info_CL_{suffix}_GPT.docx")
     bio_claude = load_docx(BIO_DIR / f"Info_CL_{suffix}_Claude.docx")
 
     return {
-        "bio_gpt": bio_gpt,
-        "bio_claude": bio_claude
+        "bio_gpt": put_text(bio_gpt),
+        "bio_claude": put_text(bio_claude)
     }
 
 
@@ -46,37 +58,43 @@ def node_generate(state: CoverLetterState) -> dict:
     """Generate both versions."""
     insights = get_insights_for_prompt()
 
+    job = state["job_description"]
+    # Relevant paragraphs only; full bio if retrieval is off or nothing matches
+    bio_gpt = resolve(state["bio_gpt"])
+    bio_claude = resolve(state["bio_claude"])
+
     version_gpt = generate_cover_letter(
-        state["job_description"],
-        state["bio_gpt"],
+        job,
+        select_relevant(bio_gpt, job) or bio_gpt,
         "gpt4o",
         insights
     )
 
     version_claude = generate_cover_letter(
-        state["job_description"],
-        state["bio_claude"],
+        job,
+        select_relevant(bio_claude, job) or bio_claude,
         "claude_sonnet",
         insights
     )
 
     return {
-        "version_gpt": version_gpt,
-        "version_claude": version_claude
+        "version_gpt": put_text(version_gpt),
+        "version_claude": put_text(version_claude)
     }
 
 
 def node_critic(state: CoverLetterState) -> dict:
     """Critic analyzes and creates fusion."""
     result = critique_and_fuse(
-        state["version_gpt"],
-        state["version_claude"],
+        resolve(state["version_gpt"]),
+        resolve(state["version_claude"]),
         state["job_description"]
     )
+    fusion_ref = put_text(result["fusion_letter"])
     return {
-        "analysis_text": result["analysis_text"],
-        "fusion_letter": result["fusion_letter"],
-        "current_letter": result["fusion_letter"],
+        "analysis_text": put_text(result["analysis_text"]),
+        "fusion_letter": fusion_ref,
+        "current_letter": fusion_ref,
         "edit_rounds": 0
     }
 
@@ -86,17 +104,26 @@ def node_edit(state: CoverLetterState) -> dict:
     insights = get_insights_for_prompt()
 
     # Use the appropriate bio based on category
-    bio = state["bio_gpt"] if state["category"] == "engineering" else state["bio_claude"]
+    bio = resolve(state["bio_gpt"] if state["category"] == "engineering" else state["bio_claude"])
+
+    # Rolling context: still-active earlier constraints + latest feedback only
+    dislikes = state.get("user_dislikes", [])
+    latest = dislikes[-1] if dislikes else ""
+
+    # Bio paragraphs relevant to the job and this round's feedback;
+    # stay within the edit bio budget if retrieval is off or nothing matches
+    bio = select_relevant(bio, f"{state['job_description']}\n{latest}") or trim_to_budget(bio)
+    active = merge_constraints(state.get("active_constraints", []), latest)
+    latest_parts = set(split_constraints(latest))
+    earlier = within_budget([c for c in active if c not in latest_parts])
+    feedback = build_edit_feedback(earlier, latest)
 
-    # Build feedback from ALL rounds, not just current
-    all_dislikes = state.get("user_dislikes", [])
-    if len(all_dislikes) > 1:
-        feedback = "\n".join(f"Round {i+1}: {fb}" for i, fb in enumerate(all_dislikes))
-    else:
-        feedback = all_dislikes[0] if all_dislikes else ""
+    edit_round = state.get("edit_rounds", 0) + 1
+    logger.info("Edit round %d: %d active constraints, %d sent from earlier rounds",
+                edit_round, len(active), len(earlier))
 
     edited = edit_cover_letter(
-        state["current_letter"],
+        resolve(state["current_letter"]),
         feedback,
         bio,
         insights,
@@ -104,8 +131,9 @@ def node_edit(state: CoverLetterState) -> dict:
     )
 
     return {
-        "current_letter": edited,
-        "edit_rounds": state.get("edit_rounds", 0) + 1
+        "current_letter": put_text(edited),
+        "active_constraints": active,
+        "edit_rounds": edit_round
     }
 
 
@@ -123,21 +151,26 @@ def node_save_insights(state: CoverLetterState) -> dict:
         latest_likes, latest_dislikes, current
     )
 
-    # Merge and save immediately
-    merged = merge_insights(
-        current, new_insights, latest_likes, latest_dislikes
-    )
-    save_insights(merged)
+    # Merge and save immediately (re-load: other sessions may have saved meanwhile)
+    with insights_lock:
+        merged = merge_insights(
+            load_insights(), new_insights, latest_likes, latest_dislikes
+        )
+        save_insights(merged)
 
     return {}
 
 
 def node_compact_insights(state: CoverLetterState) -> dict:
     """Compact and clean up accumulated insights on approval."""
-    current = load_insights()
+    snapshot = load_insights()
+
+    # Use LLM to compact/dedupe insights (outside the lock: may take seconds)
+    compacted = compact_insights(snapshot)
 
-    # Use LLM to compact/dedupe insights
-    compacted = compact_insights(current)
-    save_insights(compacted)
+    # Keep items and history other sessions saved while compacting
+    with insights_lock:
+        merged = fold_concurrent_insights(compacted, snapshot, load_insights())
+        save_insights(merged)
 
     return {"final_letter": state["current_letter"]}
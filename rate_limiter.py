@@ -0,0 +1,342 @@
+"""Per-model rate limiting and adaptive concurrency for LLM calls.
+
+Each model key gets one shared `ModelLimiter` holding:
+- a request bucket and a token bucket (requests/min, tokens/min)
+- an AIMD concurrency window: +1 per window of successful calls,
+  halved on 429, trimmed by 10% when latency per token drifts well above
+  its slowly-moving baseline (one model key serves prompts of very
+  different sizes, so raw latency alone is not a congestion signal)
+
+Both sync (`with limiter.acquire(...)`) and async
+(`async with limiter.acquire_async(...)`) callers share the same state,
+so notebook calls, batch threads and server requests see one budget.
+"""
+import asyncio
+import threading
+import time
+from contextlib import contextmanager, asynccontextmanager
+
+
+class TokenBucket:
+    """Token bucket that hands out reservations instead of blocking.
+
+    `reserve` deducts immediately (the level may go negative) and returns
+    how long the caller has to wait, so waiters are served in FIFO order.
+    Not thread-safe on its own; `ModelLimiter` guards it with its lock.
+    """
+
+    def __init__(self, rate_per_min: float, capacity: float = None):
+        self.rate = rate_per_min / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_min
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take `amount` and return seconds to wait before it is covered."""
+        self._refill(now)
+        # A single oversize request must still get through eventually
+        amount = min(amount, self.capacity)
+        self.level -= amount
+        return 0.0 if self.level >= 0 else -self.level / self.rate
+
+    def adjust(self, delta: float):
+        """Return (delta > 0) or charge (delta < 0) tokens after the fact."""
+        self.level = min(self.capacity, self.level + delta)
+
+
+class Ticket:
+    """One admitted call. Report the outcome before leaving the context."""
+
+    def __init__(self, estimated_tokens: int):
+        self.estimated_tokens = estimated_tokens
+        self.used_tokens = None
+        self.ok = False
+        self.throttled = False
+        self.retry_after = None
+        self.started = time.monotonic()
+
+    def done(self, used_tokens: int = None):
+        """Mark call as successful, optionally with actual token usage."""
+        self.ok = True
+        self.used_tokens = used_tokens
+
+    def throttle(self, retry_after: float = None):
+        """Mark call as rejected by the provider (HTTP 429)."""
+        self.throttled = True
+        self.retry_after = retry_after
+
+
+class ModelLimiter:
+    """Request/token buckets plus an AIMD concurrency window for one model."""
+
+    def __init__(self, requests_per_min: float = 60, tokens_per_min: float = 100_000,
+                 max_concurrency: int = 8, min_concurrency: int = 1,
+                 initial_concurrency: int = 2, latency_factor: float = 2.0):
+        self.requests = TokenBucket(requests_per_min)
+        self.tokens = TokenBucket(tokens_per_min)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.latency_factor = latency_factor
+
+        self.limit = float(max(min_concurrency, min(initial_concurrency, max_concurrency)))
+        self.in_flight = 0
+        self.cooldown_until = 0.0
+        self.latency_ewma = None
+        self.per_token_baseline = None
+        self.last_decrease = 0.0
+        self.stats = {"calls": 0, "throttled": 0, "wait_s": 0.0}
+
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._async_waiters = []
+
+    # --- slot management ---
+
+    def _take_slot(self) -> bool:
+        """Claim a concurrency slot if one is free. Caller holds the lock."""
+        if self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return True
+        return False
+
+    def _wake_waiters(self):
+        """Wake sync and async waiters. Caller holds the lock."""
+        self._cond.notify_all()
+        for loop, fut in self._async_waiters:
+            loop.call_soon_threadsafe(lambda f=fut: f.done() or f.set_result(None))
+        self._async_waiters = []
+
+    def _reserve(self, estimated_tokens: int) -> float:
+        """Reserve bucket capacity and return total wait. Caller holds the lock."""
+        now = time.monotonic()
+        wait = max(
+            self.cooldown_until - now,
+            self.requests.reserve(1, now),
+            self.tokens.reserve(estimated_tokens, now),
+        )
+        return max(wait, 0.0)
+
+    # --- outcome handling ---
+
+    def _record(self, ticket: Ticket):
+        """Apply AIMD update from a finished call. Caller holds the lock."""
+        now = time.monotonic()
+        self.stats["calls"] += 1
+
+        if ticket.throttled:
+            self.stats["throttled"] += 1
+            # 429: one halving per window, then back off for Retry-After
+            if now - self.last_decrease > (self.latency_ewma or 1.0):
+                self.limit = max(self.min_concurrency, self.limit / 2)
+                self.last_decrease = now
+            if ticket.retry_after:
+                self.cooldown_until = max(self.cooldown_until, now + ticket.retry_after)
+            # Rejected request did not consume provider tokens
+            self.tokens.adjust(ticket.estimated_tokens)
+            return
+
+        if not ticket.ok:
+            # Network error, 5xx or cancelled while waiting: no congestion
+            # signal, and the reservation should not starve healthy calls
+            self.tokens.adjust(ticket.estimated_tokens)
+            return
+
+        if ticket.used_tokens is not None:
+            self.tokens.adjust(ticket.estimated_tokens - ticket.used_tokens)
+
+        latency = now - ticket.started
+        self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+
+        # Seconds per token, compared to a slow EWMA rather than the fastest call seen
+        tokens = ticket.used_tokens or ticket.estimated_tokens or 1
+        per_token = latency / tokens
+        baseline = self.per_token_baseline
+        self.per_token_baseline = per_token if baseline is None else 0.95 * baseline + 0.05 * per_token
+
+        congested = baseline is not None and per_token > self.latency_factor * baseline
+        if congested:
+            # At most one decrease per window; congested samples never grow it
+            if now - self.last_decrease > self.latency_ewma:
+                self.limit = max(self.min_concurrency, self.limit * 0.9)
+                self.last_decrease = now
+        else:
+            # Additive increase: roughly +1 after a full window of successes
+            self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+
+    def _release(self, ticket: Ticket):
+        with self._lock:
+            self.in_flight -= 1
+            self._record(ticket)
+            self._wake_waiters()
+
+    # --- public API ---
+
+    @contextmanager
+    def acquire(self, estimated_tokens: int = 0):
+        """Block until the call may proceed; yield a `Ticket`."""
+        with self._lock:
+            while not self._take_slot():
+                self._cond.wait()
+            wait = self._reserve(estimated_tokens)
+            self.stats["wait_s"] += wait
+        ticket = Ticket(estimated_tokens)
+        try:
+            if wait:
+                time.sleep(wait)
+            ticket.started = time.monotonic()
+            yield ticket
+        finally:
+            self._release(ticket)
+
+    @asynccontextmanager
+    async def acquire_async(self, estimated_tokens: int = 0):
+        """Async version of `acquire`; never blocks the event loop."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self._take_slot():
+                    wait = self._reserve(estimated_tokens)
+                    self.stats["wait_s"] += wait
+                    break
+                fut = loop.create_future()
+                self._async_waiters.append((loop, fut))
+            await fut
+        ticket = Ticket(estimated_tokens)
+        try:
+            if wait:
+                await asyncio.sleep(wait)
+            ticket.started = time.monotonic()
+            yield ticket
+        finally:
+            self._release(ticket)
+
+    def snapshot(self) -> dict:
+        """Current limiter state, for logging and load tests."""
+        with self._lock:
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "latency_ewma": self.latency_ewma,
+                **self.stats,
+            }
+
+
+_LIMITERS = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_limiter(model_key: str, **limits) -> ModelLimiter:
+    """Return the process-wide limiter for `model_key`, creating it on first use."""
+    with _REGISTRY_LOCK:
+        if model_key not in _LIMITERS:
+            _LIMITERS[model_key] = ModelLimiter(**limits)
+        return _LIMITERS[model_key]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 chars per token)."""
+    return len(text) // 4 + 1
+
+
+def _self_check():
+    """Behaviour check: `python rate_limiter.py` (about 20 s, no network)."""
+    import random
+    from collections import deque
+
+    def run_threads(limiter, n_threads, calls, call):
+        def worker():
+            for _ in range(calls):
+                call(limiter)
+        threads = [threading.Thread(target=worker) for _ in range(n_threads)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    def sleeper(durations, tokens=500):
+        def call(limiter):
+            with limiter.acquire(tokens) as ticket:
+                time.sleep(random.choice(durations))
+                ticket.done(tokens)
+        return call
+
+    # 1. Mixed short/long calls on one model key are not congestion
+    limiter = ModelLimiter(requests_per_min=10**6, tokens_per_min=10**9, max_concurrency=16)
+    run_threads(limiter, 32, 15, sleeper([0.03, 0.3]))
+    print("mixed latencies:", limiter.snapshot())
+    assert limiter.limit >= 12, limiter.limit
+
+    # 2. Uniform calls open the window fully
+    limiter = ModelLimiter(requests_per_min=10**6, tokens_per_min=10**9, max_concurrency=16)
+    run_threads(limiter, 32, 20, sleeper([0.05]))
+    print("uniform latency:", limiter.snapshot())
+    assert limiter.limit == 16, limiter.limit
+
+    # 3. Provider capped at 10 req/s: 429s shrink the window, throughput stays near the cap
+    window, provider_lock, accepted = deque(), threading.Lock(), [0]
+
+    def capped(limiter):
+        with limiter.acquire(100) as ticket:
+            with provider_lock:
+                now = time.monotonic()
+                while window and now - window[0] > 1.0:
+                    window.popleft()
+                rejected = len(window) >= 10
+                if not rejected:
+                    window.append(now)
+                    accepted[0] += 1
+            if rejected:
+                ticket.throttle(0.2)
+            else:
+                time.sleep(0.1)
+                ticket.done(100)
+
+    limiter = ModelLimiter(requests_per_min=10**6, tokens_per_min=10**9, max_concurrency=16)
+    start = time.monotonic()
+    run_threads(limiter, 16, 5, capped)
+    rate = accepted[0] / (time.monotonic() - start)
+    print(f"provider cap 10 req/s: {rate:.1f} req/s accepted,", limiter.snapshot())
+    assert rate >= 7, rate
+
+    # 4. Congested samples inside the decrease hold-off do not grow the window
+    limiter = ModelLimiter(max_concurrency=16, initial_concurrency=8)
+    limiter.per_token_baseline, limiter.latency_ewma = 0.001, 10.0
+    limiter.last_decrease = time.monotonic()
+    ticket = Ticket(100)
+    ticket.started -= 1.0  # 10 ms/token, 10x baseline
+    ticket.done(100)
+    with limiter._lock:
+        limiter._record(ticket)
+    assert limiter.limit == 8, limiter.limit
+
+    # 5. Failed calls (no done/throttle) refund their token reservation
+    limiter = ModelLimiter(requests_per_min=10**6, tokens_per_min=1000)
+    for _ in range(20):
+        try:
+            with limiter.acquire(900):
+                raise ConnectionError
+        except ConnectionError:
+            pass
+    assert limiter.tokens.level > 900, limiter.tokens.level
+
+    # 6. Async callers share the same limiter
+    async def async_calls():
+        async def one():
+            async with limiter.acquire_async(10) as ticket:
+                await asyncio.sleep(0.01)
+                ticket.done(10)
+        await asyncio.gather(*(one() for _ in range(50)))
+
+    limiter = ModelLimiter(requests_per_min=10**6, tokens_per_min=10**9, max_concurrency=4)
+    asyncio.run(async_calls())
+    assert limiter.stats["calls"] == 50 and limiter.in_flight == 0
+
+    print("rate_limiter self-check passed")
+
+
+if __name__ == "__main__":
+    _self_check()
@@ -0,0 +1,198 @@
+"""Local HTTP service around the cover letter graph.
+
+One process, one compiled graph, one MemorySaver checkpointer; each session
+is a LangGraph thread keyed by `thread_id`. Replaces `input()` prompts from
+`utils.get_feedback` with endpoints mirroring the notebook steps:
+
+    POST /sessions                      -> classify (pauses before load_bios)
+    POST /sessions/{id}/category        -> confirm or override category
+    GET  /sessions/{id}/stream          -> run to next pause, SSE node updates
+    POST /sessions/{id}/feedback        -> score/likes/dislikes, run one edit
+    POST /sessions/{id}/approve         -> compact insights, return final letter
+    GET  /sessions/{id}                 -> current state
+    DELETE /sessions/{id}               -> drop checkpoints, lock and unused blobs
+
+Sessions stay readable after approval until deleted; clients (and
+load_test.py) should DELETE finished sessions, otherwise the checkpointer
+and blob store grow with every session.
+
+Run:  uvicorn server:app --port 8000
+Load test against mock_llm.py: see load_test.py.
+"""
+import asyncio
+import json
+import uuid
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool, iterate_in_threadpool
+
+from graph import create_graph_with_memory
+from blob_store import resolve_state, prune_unreferenced
+
+app = FastAPI(title="Cover Letter Agent")
+graph, memory = create_graph_with_memory()
+
+# Graph runs for one thread must not overlap; different threads run in parallel
+_session_locks: dict[str, asyncio.Lock] = {}
+
+# State fields returned to clients (bios stay server-side)
+PUBLIC_FIELDS = [
+    "category", "confidence", "version_gpt", "version_claude", "analysis_text",
+    "fusion_letter", "current_letter", "user_score", "approved", "edit_model",
+    "edit_rounds", "final_letter",
+]
+
+
+class StartRequest(BaseModel):
+    job_description: str
+    edit_model: str = "gpt4o"
+
+
+class CategoryRequest(BaseModel):
+    category: Optional[str] = None  # None = accept classifier's choice
+
+
+class FeedbackRequest(BaseModel):
+    score: int
+    likes: str = ""
+    dislikes: str = ""
+    edit_model: Optional[str] = None
+
+
+def _config(thread_id: str) -> dict:
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def _lock(thread_id: str) -> asyncio.Lock:
+    if thread_id not in _session_locks:
+        raise HTTPException(404, f"Unknown session: {thread_id}")
+    return _session_locks[thread_id]
+
+
+def _public_state(thread_id: str) -> dict:
+    snapshot = graph.get_state(_config(thread_id))
+    values = resolve_state(snapshot.values)
+    state = {k: values[k] for k in PUBLIC_FIELDS if k in values}
+    state["thread_id"] = thread_id
+    state["next"] = list(snapshot.next)
+    return state
+
+
+# /stream may start (or resume a cut-off stream) only before these nodes
+STREAMABLE_NODES = ("load_bios", "generate", "critic")
+
+
+def _require_next(thread_id: str, *nodes: str):
+    """Reject calls made at the wrong point of the workflow."""
+    nxt = graph.get_state(_config(thread_id)).next
+    if not any(node in nxt for node in nodes):
+        raise HTTPException(409, f"Session is not waiting before {list(nodes)} (next: {list(nxt)})")
+
+
+@app.post("/sessions")
+async def start_session(req: StartRequest):
+    """Create a session and classify the job (pauses before load_bios)."""
+    thread_id = uuid.uuid4().hex
+    _session_locks[thread_id] = asyncio.Lock()
+    async with _session_locks[thread_id]:
+        await run_in_threadpool(graph.invoke, {
+            "job_description": req.job_description,
+            "approved": False,
+            "edit_model": req.edit_model,
+        }, _config(thread_id))
+        return _public_state(thread_id)
+
+
+@app.get("/sessions/{thread_id}")
+async def get_session(thread_id: str):
+    _lock(thread_id)
+    return _public_state(thread_id)
+
+
+@app.post("/sessions/{thread_id}/category")
+async def confirm_category(thread_id: str, req: CategoryRequest):
+    """Accept or override the category; generation starts on /stream."""
+    async with _lock(thread_id):
+        _require_next(thread_id, "load_bios")
+        if req.category:
+            category = req.category.lower()
+            if category not in ("engineering", "finance"):
+                raise HTTPException(422, "category must be 'engineering' or 'finance'")
+            graph.update_state(_config(thread_id), {"category": category})
+        return _public_state(thread_id)
+
+
+@app.get("/sessions/{thread_id}/stream")
+async def stream_session(thread_id: str):
+    """Run the graph to its next pause, streaming one SSE event per node.
+
+    After category confirmation this covers load_bios -> generate -> critic;
+    the `critic` event carries the analysis and fusion letter. Edit rounds
+    go through /feedback, so streaming from `review` is rejected.
+    """
+    lock = _lock(thread_id)
+    _require_next(thread_id, *STREAMABLE_NODES)
+
+    async def events():
+        async with lock:
+            # Re-check: another request may have advanced the session meanwhile
+            try:
+                _require_next(thread_id, *STREAMABLE_NODES)
+            except HTTPException as e:
+                yield f"event: error\ndata: {json.dumps({'status': e.status_code, 'detail': e.detail})}\n\n"
+                return
+            updates = graph.stream(None, _config(thread_id), stream_mode="updates")
+            async for update in iterate_in_threadpool(updates):
+                for node, values in update.items():
+                    if not isinstance(values, dict):
+                        continue  # interrupt markers carry no state
+                    public = {k: v for k, v in resolve_state(values).items() if k in PUBLIC_FIELDS}
+                    yield f"event: {node}\ndata: {json.dumps(public)}\n\n"
+            yield f"event: paused\ndata: {json.dumps(_public_state(thread_id))}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/sessions/{thread_id}/feedback")
+async def submit_feedback(thread_id: str, req: FeedbackRequest):
+    """Save feedback as insights and run one edit round."""
+    async with _lock(thread_id):
+        _require_next(thread_id, "review")
+        update = {
+            "approved": False,
+            "user_score": req.score,
+            "user_likes": [req.likes],
+            "user_dislikes": [req.dislikes],
+        }
+        if req.edit_model:
+            update["edit_model"] = req.edit_model
+        graph.update_state(_config(thread_id), update)
+        await run_in_threadpool(graph.invoke, None, _config(thread_id))
+        return _public_state(thread_id)
+
+
+@app.post("/sessions/{thread_id}/approve")
+async def approve(thread_id: str):
+    """Approve the current letter; compacts insights and finishes the session."""
+    async with _lock(thread_id):
+        _require_next(thread_id, "review")
+        graph.update_state(_config(thread_id), {
+            "approved": True,
+            "user_score": 10,
+            "user_likes": ["Approved"],
+        })
+        await run_in_threadpool(graph.invoke, None, _config(thread_id))
+        return _public_state(thread_id)
+
+
+@app.delete("/sessions/{thread_id}")
+async def delete_session(thread_id: str):
+    """Forget a session: its checkpoints, its lock and blobs nothing else uses."""
+    async with _lock(thread_id):
+        await run_in_threadpool(memory.delete_thread, thread_id)
+        del _session_locks[thread_id]
+    pruned = await run_in_threadpool(prune_unreferenced, memory)
+    return {"thread_id": thread_id, "deleted": True, "blobs_pruned": pruned}
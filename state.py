@@ -5,7 +5,11 @@ from langgraph.graph.message import add_messages
 
 
 class CoverLetterState(TypedDict):
-    """State for the cover letter generation workflow."""
+    """State for the cover letter generation workflow.
+
+    Large text fields (bios, versions, analysis, letters) hold `blob:<sha256>`
+    references from blob_store; use `resolve()` / `resolve_state()` to read them.
+    """
     # Input
     job_description: str
 
@@ -37,6 +41,7 @@ class CoverLetterState(TypedDict):
     # Edit control
     edit_model: str  # "claude_opus" or "gpt4o"
     edit_rounds: int
+    active_constraints: list[str]  # Deduplicated dislikes still in force (edit_context)
 
     # Final
     final_letter: str